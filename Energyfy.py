@@ -2,6 +2,7 @@ __version__ = "1.2.2"
 import sys
 import time
 import argparse
+import atexit
 import os
 import concurrent.futures
 from utils import Defaults
@@ -97,34 +98,34 @@ def parse_args():
 
     return parser.parse_args()
 
-def send_notifications(room_name, balance, alert_balance, room_config, notification):
-    """并行发送通知的辅助函数"""
+def send_notifications(room_name, balance, alert_balance, room_config, notification, push_executor):
+    """并行发送通知的辅助函数，Server酱推送通过 push_executor 并发进行"""
     logger = get_logger()
     logger.debug("[send_notifications] 准备发送通知 -> 房间: %s, 当前余额: %s, 阈值: %s",
                  room_name, balance, alert_balance)
     logger.debug("[send_notifications] 通知配置: %s", room_config)
 
-    # 准备通知内容
-    text_content = Defaults.generate_text_email(room_name, balance, alert_balance)
-    html_content = Defaults.generate_html_email(room_name, balance, alert_balance)
-    markdown_content = Defaults.generate_markdown_notification(room_name, balance, alert_balance)
+    # 准备通知内容，金额只格式化一次，三种格式共用
+    params = (room_name, f"{balance:.2f}", f"{alert_balance:.2f}")
+    text_content = Defaults.generate_text_email(*params)
+    html_content = Defaults.generate_html_email(*params)
+    markdown_content = Defaults.generate_markdown_notification(*params)
     logger.debug("[send_notifications] 已生成通知内容（text/html/markdown）")
 
-    # 发送Server酱通知
+    # 发送Server酱通知：各收件人的推送提交到推送线程池并行进行
+    push_futures = {}
     if room_config["server_chan"]["enabled"]:
         for recipient in room_config["server_chan"]["recipients"]:
             logger.debug("[send_notifications] 准备发送 Server酱 -> UID: %s", recipient['uid'])
-            try:
-                notification.send_server_chan(
-                    uid=recipient["uid"],
-                    sendkey=recipient["sendkey"],
-                    title="电费余额告警",
-                    desp=markdown_content,
-                    short="宿舍电费余额不足，请尽快缴费!",
-                )
-                logger.info(f"已向Server酱用户 {recipient['uid']} 发送通知")
-            except Exception as e:
-                logger.exception(f"发送Server酱通知失败（用户 {recipient['uid']}）")
+            future = push_executor.submit(
+                notification.send_server_chan,
+                uid=recipient["uid"],
+                sendkey=recipient["sendkey"],
+                title="电费余额告警",
+                desp=markdown_content,
+                short="宿舍电费余额不足，请尽快缴费!",
+            )
+            push_futures[future] = recipient["uid"]
 
     # 发送邮件通知
     logger.debug("[send_notifications] 准备发送邮件 -> 收件人: %s", room_config['recipients'])
@@ -135,9 +136,18 @@ def send_notifications(room_name, balance, alert_balance, room_config, notificat
             text_content=text_content,
             html_content=html_content
         )
-        logger.info(f"已向房间 {room_name} 发送邮件通知")
+        logger.info("已向房间 %s 发送邮件通知", room_name)
     except Exception as e:
-        logger.exception(f"发送邮件失败（房间 {room_name}）")
+        logger.exception("发送邮件失败（房间 %s）", room_name)
+
+    # 邮件发送期间推送已在并行进行，这里等待全部完成
+    concurrent.futures.wait(push_futures)
+    for future, uid in push_futures.items():
+        exc = future.exception()
+        if exc is None:
+            logger.info("已向Server酱用户 %s 发送通知", uid)
+        else:
+            logger.exception("发送Server酱通知失败（用户 %s）", uid, exc_info=exc)
 
 
 def main(path=None):
@@ -170,19 +180,45 @@ def main(path=None):
         )
         reporter.start()
 
+    # 房间信息查询器跨轮次复用，保持HTTP连接池
+    room_info = None
+    # 通知管理器同样跨轮次复用，只在SMTP配置变化时重建
+    notification = None
+    notification_smtp = None
+
+    # 通知线程池在整个进程生命周期内复用，避免每轮重复创建销毁线程
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(5, len(config_reader.get("queries", []))),
+        thread_name_prefix="notify"
+    )
+    atexit.register(executor.shutdown, wait=True)
+
+    # Server酱推送使用独立的线程池，限制并发数，同时避免通知任务等待自身线程池而死锁
+    push_executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=8,
+        thread_name_prefix="push"
+    )
+    atexit.register(push_executor.shutdown, wait=True)
+
+    # 启动时及配置文件变化后输出一次配置摘要
+    log_config = True
+
     # 主循环
     while True:
         try:
 
             logger.info("===============开始查询===============")
 
-            # 验证配置文件
-            logger.debug("[main] 开始验证配置文件...")
-            config_reader.validate()
+            # 验证配置文件（文件未变化时直接沿用上次的验证结果）
+            logger.debug("[main] 检查配置文件是否变化...")
+            if config_reader.reload_if_changed():
+                logger.debug("[main] 配置文件已重新加载")
+                log_config = True
             logger.info("配置文件验证通过")
-            logger.info("当前配置:")
-            for line in str(config_reader).split("\n"):
-                logger.info(line)
+            if log_config:
+                # 配置摘要作为一条多行日志输出，由日志模块按需格式化
+                logger.info("当前配置:\n%s", config_reader)
+                log_config = False
 
             # 读取配置
             username = config_reader.get("username")
@@ -193,78 +229,94 @@ def main(path=None):
             queries = config_reader.get("queries")
             logger.debug("[main] 已加载配置 -> 用户: %s, 检查间隔: %s, 阈值: %s, 查询数: %s",
                          username, check_interval, alert_balance, len(queries))
-            # 初始化通知管理器
-            logger.debug("[main] 初始化 NotificationManager")
-            notification = NotificationManager(
-                email_host=smtp_config["server"],
-                email_port=smtp_config["port"],
-                encryption=smtp_config["security"],
-                email_username=smtp_config["username"],
-                email_password=smtp_config["password"],
-                email_sender=smtp_config["username"]
-            )
+            # 初始化通知管理器，仅在SMTP配置变化时重建
+            if notification is None or smtp_config != notification_smtp:
+                logger.debug("[main] 初始化 NotificationManager")
+                # 先关闭旧实例缓存的SMTP连接与HTTP会话；上一轮的推送任务均已等待完成
+                if notification is not None:
+                    notification.close()
+                notification = NotificationManager(
+                    email_host=smtp_config["server"],
+                    email_port=smtp_config["port"],
+                    encryption=smtp_config["security"],
+                    email_username=smtp_config["username"],
+                    email_password=smtp_config["password"],
+                    email_sender=smtp_config["username"]
+                )
+                notification_smtp = dict(smtp_config)
 
-            # 初始化房间信息查询器
-            logger.debug("[main] 初始化 RoomInfo")
-            room_info = RoomInfo(username, password)
+            # 初始化房间信息查询器，仅在账号变化时重建
+            if room_info is None or (room_info.USERNAME, room_info.PASSWORD) != (username, password):
+                logger.debug("[main] 初始化 RoomInfo")
+                room_info = RoomInfo(username, password)
 
-            # 获取所有房间名称
-            room_names = [q["room_name"] for q in queries]
+            # 按房间名索引配置（重复房间以第一条为准），同时得到查询顺序的房间列表
+            queries_by_name = {}
+            for q in queries:
+                queries_by_name.setdefault(q["room_name"], q)
+            room_names = list(queries_by_name)
 
             # 查询房间余额
-            logger.info(f"开始查询{len(room_names)}个房间的余额信息")
+            logger.info("开始查询%d个房间的余额信息", len(room_names))
             logger.debug("[main] 查询房间列表: %s", room_names)
 
             results = room_info.get(room_names)
             logger.debug("[main] 查询结果原始数据: %s", results)
 
-            # 处理需要通知的房间
+            # 处理需要通知的房间，余额与阈值统一换算为整数分后比较，避免浮点误差
+            alert_cents = int(round(alert_balance * 100))
             alert_rooms = []
             for room_name, result in results:
                 logger.debug("[main] 处理查询结果 -> 房间: %s, 数据: %s", room_name, result)
                 if result is None:
-                    logger.warning(f"房间 {room_name} 查询失败")
+                    logger.warning("房间 %s 查询失败", room_name)
                     continue
 
-                balance = float(result.get("syje", '0.0'))
+                try:
+                    balance_cents = int(round(float(result.get("syje", '0.0')) * 100))
+                except (TypeError, ValueError):
+                    logger.warning("房间 %s 余额数据无效: %s", room_name, result.get("syje"))
+                    continue
+                balance = balance_cents / 100
 
                 # 检查余额是否低于阈值
-                if balance < alert_balance:
-                    logger.info(f"房间 {room_name} 当前余额: {balance:.2f}元, 低于阈值 ({balance:.2f} < {alert_balance})")
+                if balance_cents < alert_cents:
+                    logger.info("房间 %s 当前余额: %.2f元, 低于阈值 %.2f元",
+                                room_name, balance, alert_balance)
                     alert_rooms.append((room_name, balance))
                 else:
-                    logger.info(f"房间 {room_name} 当前余额: {balance:.2f}元")
+                    logger.info("房间 %s 当前余额: %.2f元", room_name, balance)
 
             # 并行发送通知
             if alert_rooms:
-                logger.info(f"{len(alert_rooms)}个房间需要通知")
+                logger.info("%d个房间需要通知", len(alert_rooms))
                 logger.debug("[main] 待通知房间详情: %s", alert_rooms)
 
-                # 使用线程池并行发送
-                with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+                # 使用常驻线程池并行发送，本轮所有邮件复用同一个SMTP连接
+                with notification.smtp_session():
                     futures = []
                     for room_name, balance in alert_rooms:
                         # 查找该房间的配置
-                        room_config = next((q for q in queries if q["room_name"] == room_name), None)
+                        room_config = queries_by_name.get(room_name)
                         logger.debug("[main] 匹配到房间配置: %s", room_config)
 
                         if not room_config:
-                            logger.warning(f"[main] 未找到房间 {room_name} 的配置，跳过通知")
+                            logger.warning("[main] 未找到房间 %s 的配置，跳过通知", room_name)
                             continue
 
                         # 提交发送任务
                         future = executor.submit(
                             send_notifications,
-                            room_name, balance, alert_balance, room_config, notification
+                            room_name, balance, alert_balance, room_config, notification, push_executor
                         )
                         futures.append(future)
 
-                    # 等待所有任务完成
-                    for future in concurrent.futures.as_completed(futures):
-                        try:
-                            future.result()
-                        except Exception as e:
-                            logger.exception("通知任务异常")
+                    # 等待所有任务完成，只对失败的任务记录异常
+                    done, _ = concurrent.futures.wait(futures)
+                    for future in done:
+                        exc = future.exception()
+                        if exc is not None:
+                            logger.exception("通知任务异常", exc_info=exc)
             else:
                 logger.debug("[main] 没有需要通知的房间")
 
@@ -273,7 +325,7 @@ def main(path=None):
                 logger.info("单次检查模式，程序退出")
                 return
 
-            logger.info(f"下次检查将在 {check_interval} 秒后进行")
+            logger.info("下次检查将在 %s 秒后进行", check_interval)
             time.sleep(check_interval)
 
         except Exception as e:
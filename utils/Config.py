@@ -1,14 +1,122 @@
 import os
 import json
-import re
 import platform
+import stat
+import string
 import sys
+from itertools import islice
 from pathlib import Path
-import jsonschema
-from jsonschema import validate, Draft7Validator
 from utils.Defaults import _DEFAULT_SCHEMA
 from utils.Logger import get_logger
 
+# 邮箱与主机名允许的ASCII字符集，用于 bytes.translate 整串删除后判空
+_ALNUM_CHARS = (string.ascii_letters + string.digits).encode('ascii')
+_EMAIL_LOCAL_CHARS = _ALNUM_CHARS + b"._%+-"
+_EMAIL_DOMAIN_CHARS = _ALNUM_CHARS + b".-"
+_HOSTNAME_CHARS = _ALNUM_CHARS + b"-."
+
+
+def _is_email(instance):
+    """
+    校验邮箱格式，等价于 ^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$
+    字符集检查由 bytes.translate 在C层一次完成，不经过正则引擎
+    """
+    if not isinstance(instance, str) or not instance.isascii():
+        return False
+
+    local, at, domain = instance.partition('@')
+    if not at or not local:
+        return False
+
+    # 顶级域名为最后一个点之后的部分，至少两个字母
+    head, dot, tld = domain.rpartition('.')
+    if not dot or not head or len(tld) < 2 or not tld.isalpha():
+        return False
+
+    return (not local.encode('ascii').translate(None, _EMAIL_LOCAL_CHARS)
+            and not head.encode('ascii').translate(None, _EMAIL_DOMAIN_CHARS))
+
+
+def _is_hostname(instance):
+    """校验主机名格式 (RFC 1123)：点分标签，每段 1-63 个字母、数字或连字符"""
+    if not isinstance(instance, str) or not instance.isascii():
+        return False
+
+    if not all(0 < len(label) <= 63 for label in instance.split('.')):
+        return False
+
+    return not instance.encode('ascii').translate(None, _HOSTNAME_CHARS)
+
+
+# 全局共享的格式检查器，首次验证时创建，进程内只注册一次
+_FORMAT_CHECKER = None
+
+
+def _get_format_checker():
+    """获取自定义格式检查器（邮箱、主机名），首次调用时创建"""
+    global _FORMAT_CHECKER
+    if _FORMAT_CHECKER is None:
+        from jsonschema import FormatChecker
+
+        format_checker = FormatChecker()
+        format_checker.checks("email")(_is_email)
+        format_checker.checks("hostname")(_is_hostname)
+        _FORMAT_CHECKER = format_checker
+    return _FORMAT_CHECKER
+
+
+# 每个配置文件路径最近一次验证通过的结果: 路径 -> (文件签名, 配置, 展平配置, Schema)
+# 新建的 ConfigReader 读取未变化的文件时跳过解析与验证，每个路径只保留最新一份
+_CONFIG_CACHE = {}
+
+# 错误上下文提示关心的Schema关键字
+_CONTEXT_KEYS = frozenset({"enum", "minimum", "maximum", "type", "format"})
+
+# 默认最多报告的验证错误条数，避免大数组整体不匹配时逐条展开
+_MAX_REPORTED_ERRORS = 20
+
+# 已编译的验证器，按Schema内容（排序后的JSON文本）缓存，重新加载同一Schema时不再编译
+_VALIDATOR_CACHE = {}
+_DEFAULT_SCHEMA_KEY = object()
+
+
+def _get_validator(schema):
+    """
+    获取Schema对应的验证器，相同内容的Schema在进程内只编译一次
+    :param schema: JSON Schema 字典
+    :return: 绑定自定义格式检查器的 Draft7Validator
+    :raises SchemaError: Schema 本身不合法时抛出
+    """
+    from jsonschema import Draft7Validator
+
+    # 内嵌Schema是模块常量，按身份识别即可，无需每次序列化生成缓存键
+    key = _DEFAULT_SCHEMA_KEY if schema is _DEFAULT_SCHEMA else json.dumps(schema, sort_keys=True)
+    validator = _VALIDATOR_CACHE.get(key)
+    if validator is None:
+        get_logger().debug("[Config._get_validator] 编译 Schema 验证器")
+        Draft7Validator.check_schema(schema)
+        validator = Draft7Validator(schema, format_checker=_get_format_checker())
+        _VALIDATOR_CACHE[key] = validator
+    return validator
+
+
+def _flatten(node, prefix=""):
+    """
+    将嵌套配置展开为 (点分路径, 值) 序列，列表下标作为路径段
+    中间层的字典/列表同样会产出，使 get("smtp") 仍返回整个子对象
+    """
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        items = enumerate(node)
+    else:
+        return
+
+    for key, value in items:
+        path = f"{prefix}{key}"
+        yield path, value
+        yield from _flatten(value, path + ".")
+
 
 class ConfigReader:
     def __init__(self, config_path=None):
@@ -23,9 +131,16 @@ class ConfigReader:
         self.logger = get_logger()
         self.logger.debug("[ConfigReader] 初始化 ConfigReader，config_path=%s", config_path)
         self.config = None
+        self._flat = {}
+        # 房间摘要 [(房间名, 收件人数), ...]，首次生成摘要时构建，配置重新加载后失效
+        self._queries_summary = None
         self.schema = None
         self.is_custom_config = config_path is not None
 
+        # 最近一次验证通过时 _current_signature() 的结果（配置文件与Schema文件签名），用于跳过未变化的重新加载
+        self._file_signature = None
+        self._loaded_signature = None
+
         # 确定配置文件路径
         if config_path is None:
             if platform.system() == "Windows":
@@ -38,6 +153,9 @@ class ConfigReader:
                 config_path = home / ".config" / "Energyfy" / "configs" / "active"
 
         self.config_path = Path(config_path)
+        # 热路径上的文件检查直接使用字符串路径，Path 仅用于展示
+        self._config_path_str = str(self.config_path)
+        self._schema_path = self.config_path.parent.parent / "schema.json"
         self.logger.debug("[ConfigReader] 最终使用的配置文件路径: %s", self.config_path)
         self.validate()
 
@@ -45,15 +163,20 @@ class ConfigReader:
         """加载并解析JSON配置文件"""
         self.logger.debug("[ConfigReader._load_config] 开始加载配置文件: %s", self.config_path)
 
-        # 检查文件是否存在
-        if not self.config_path.exists():
+        # 一次 lstat 同时得到存在性和是否为符号链接，只有符号链接才需要再 stat 目标文件
+        try:
+            st = os.lstat(self._config_path_str)
+            is_link = stat.S_ISLNK(st.st_mode)
+            if is_link:
+                st = os.stat(self._config_path_str)
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"配置文件不存在: {self.config_path}\n"
                 "请确保路径正确且文件已创建"
-            )
+            ) from None
 
         # 对于默认配置路径，检查是否为符号链接
-        if not self.is_custom_config and not self.config_path.is_symlink():
+        if not self.is_custom_config and not is_link:
             print(
                 f"警告: {self.config_path} 不是符号链接，"
                 "建议使用符号链接指向实际配置文件",
@@ -61,8 +184,12 @@ class ConfigReader:
             )
 
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+            self._loaded_signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+            # 一次读入原始字节交给 json 解码，省去文本流逐块解码
+            with open(self._config_path_str, 'rb') as f:
+                self.config = json.loads(f.read())
+            self._flat = dict(_flatten(self.config))
+            self._queries_summary = None
             self.logger.debug("[ConfigReader._load_config] 配置文件加载成功")
         except json.JSONDecodeError as e:
             # 提供更友好的错误位置信息
@@ -98,7 +225,7 @@ class ConfigReader:
             return
 
         # 对于默认配置路径，从文件加载Schema
-        schema_path = self.config_path.parent.parent / "schema.json"
+        schema_path = self._schema_path
         self.logger.debug("[ConfigReader._load_schema] Schema 路径: %s", schema_path)
 
         # 检查schema文件是否存在
@@ -145,68 +272,51 @@ class ConfigReader:
             self.logger.debug("[ConfigReader.get] 配置尚未加载，返回默认值")
             return default
 
-        keys = key_path.split('.')
-        current = self.config
+        value = self._flat.get(key_path, default)
+        self.logger.debug("[ConfigReader.get] 获取到的配置值: %s", value)
+        return value
 
-        try:
-            for key in keys:
-                # 尝试处理数组索引
-                if isinstance(current, list) and key.isdigit():
-                    index = int(key)
-                    if index >= len(current):
-                        self.logger.debug("[ConfigReader.get] 索引 %d 超出范围，返回默认值", index)
-                        return default
-                    current = current[index]
-                elif isinstance(current, dict) and key in current:
-                    current = current[key]
-                else:
-                    self.logger.debug("[ConfigReader.get] 键 %s 不存在，返回默认值", key)
-                    return default
-            self.logger.debug("[ConfigReader.get] 获取到的配置值: %s", current)
-            return current
-        except (KeyError, IndexError, TypeError) as e:
-            self.logger.debug("[ConfigReader.get] 访问配置项出错: %s", e)
-            return default
+    def validate(self, collect_all=False):
+        """
+        使用JSON Schema验证配置
+        :param collect_all: 为True时报告全部错误，否则最多报告前 _MAX_REPORTED_ERRORS 条
+        :return: 验证通过返回True
+        :raises ValueError: 配置不符合Schema或Schema本身有误时抛出
+        """
+        # jsonschema 导入开销较大，推迟到首次验证时
+        from jsonschema.exceptions import SchemaError
 
-    def validate(self):
-        """使用JSON Schema验证配置"""
         self.logger.debug("[ConfigReader.validate] 开始验证配置文件")
+
+        # 配置文件与Schema文件都未变化时，直接复用进程内上次验证通过的结果
+        signature = self._current_signature()
+        cached = _CONFIG_CACHE.get(self._config_path_str)
+        if signature is not None and cached is not None and cached[0] == signature:
+            self.logger.debug("[ConfigReader.validate] 配置文件未变化，复用已验证的配置")
+            _, self.config, self._flat, self.schema = cached
+            self._queries_summary = None
+            self._loaded_signature = signature[0]
+            self._file_signature = signature
+            return True
+
         self._load_config()
         self._load_schema()
         if not self.schema:
             raise RuntimeError("无法加载JSON Schema进行验证")
 
-        # 创建自定义格式检查器
-        format_checker = jsonschema.FormatChecker()
-
-        # 添加邮箱格式验证
-        @format_checker.checks("email")
-        def validate_email(instance):
-            if not isinstance(instance, str):
-                return False
-            # 更严格的邮箱格式正则表达式
-            pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            return re.match(pattern, instance) is not None
-
-        # 添加主机名格式验证
-        @format_checker.checks("hostname")
-        def validate_hostname(instance):
-            if not isinstance(instance, str):
-                return False
-            # 主机名格式验证 (RFC 1123)
-            pattern = r'^[a-zA-Z0-9-]{1,63}(\.[a-zA-Z0-9-]{1,63})*$'
-            return re.match(pattern, instance) is not None
-
         # 验证配置
         try:
-            # 使用更详细的验证器
-            validator = Draft7Validator(
-                self.schema,
-                format_checker=format_checker
-            )
-
-            # 收集所有错误
-            errors = sorted(validator.iter_errors(self.config), key=lambda e: e.path)
+            validator = _get_validator(self.schema)
+
+            # 有效配置只走 is_valid（遇到首个错误即返回），无效时才收集错误信息
+            errors = []
+            if collect_all:
+                errors = sorted(validator.iter_errors(self.config), key=lambda e: e.path)
+            elif not validator.is_valid(self.config):
+                errors = sorted(
+                    islice(validator.iter_errors(self.config), _MAX_REPORTED_ERRORS),
+                    key=lambda e: e.path
+                )
 
             if errors:
                 error_messages = []
@@ -230,14 +340,60 @@ class ConfigReader:
                     "\n".join(error_messages)
                 )
             self.logger.debug("[ConfigReader.validate] 配置验证成功")
+            self._file_signature = (self._loaded_signature, signature[1] if signature is not None else None)
+            # 仅当读取期间文件未被改写时才缓存，避免把新内容记在旧签名下
+            if signature is not None and signature[0] == self._loaded_signature:
+                _CONFIG_CACHE[self._config_path_str] = (signature, self.config, self._flat, self.schema)
             return True
 
-        except jsonschema.exceptions.SchemaError as e:
+        except SchemaError as e:
             raise ValueError(
                 f"Schema错误: {e.message}\n"
                 "请检查Schema文件是否正确"
             ) from e
 
+    def _current_signature(self):
+        """
+        获取配置文件（及默认路径下Schema文件）当前的 (inode, 大小, 修改时间)
+        :return: (配置文件签名, Schema文件签名或None)，配置文件无法访问时返回None
+        """
+        try:
+            st = os.stat(self._config_path_str)
+        except OSError:
+            return None
+
+        schema_signature = None
+        if not self.is_custom_config:
+            try:
+                sst = os.stat(self._schema_path)
+                schema_signature = (sst.st_ino, sst.st_size, sst.st_mtime_ns)
+            except OSError:
+                pass
+        return (st.st_ino, st.st_size, st.st_mtime_ns), schema_signature
+
+    def reload_if_changed(self):
+        """
+        仅在配置文件（或默认路径下的Schema文件）变化时重新加载并验证配置
+        :return: 重新加载返回True，文件未变化返回False
+        :raises: 与 validate() 相同
+        """
+        signature = self._current_signature()
+        if signature is not None and self._file_signature == signature:
+            self.logger.debug("[ConfigReader.reload_if_changed] 配置文件未变化，跳过验证")
+            return False
+
+        self.validate()
+        return True
+
+    def is_valid(self):
+        """
+        快速判断当前已加载的配置是否符合Schema，不收集错误信息
+        :return: 配置有效返回True，否则返回False
+        """
+        if not self.config or not self.schema:
+            return False
+        return _get_validator(self.schema).is_valid(self.config)
+
     def _format_error_path(self, path):
         """格式化错误路径为易读形式"""
         if not path:
@@ -257,27 +413,32 @@ class ConfigReader:
 
     def _get_error_context(self, error):
         """获取错误上下文信息"""
+        schema = error.schema
+        hit = schema.keys() & _CONTEXT_KEYS
+        if not hit:
+            return ""
+
         # 枚举错误
-        if "enum" in error.schema:
-            options = ", ".join(map(str, error.schema["enum"]))
+        if "enum" in hit:
+            options = ", ".join(map(str, schema["enum"]))
             return f"有效选项: {options}"
 
         # 范围错误
-        if "minimum" in error.schema and "maximum" in error.schema:
-            min_val = error.schema["minimum"]
-            max_val = error.schema["maximum"]
+        if "minimum" in hit and "maximum" in hit:
+            min_val = schema["minimum"]
+            max_val = schema["maximum"]
             return f"有效范围: {min_val} - {max_val}"
 
         # 类型错误
-        if "type" in error.schema:
-            expected = error.schema["type"]
+        if "type" in hit:
+            expected = schema["type"]
             if isinstance(expected, list):
                 expected = "或".join(expected)
             return f"期望类型: {expected}"
 
         # 格式错误
-        if "format" in error.schema:
-            return f"期望格式: {error.schema['format']}"
+        if "format" in hit:
+            return f"期望格式: {schema['format']}"
 
         return ""
 
@@ -291,14 +452,16 @@ class ConfigReader:
         summary += f"检查间隔: {self.get('check_interval', '未设置')}秒\n"
         summary += f"告警阈值: {self.get('alert_balance', '未设置')}元\n"
 
-        queries = self.get('queries', [])
-        summary += f"监控房间数: {len(queries)}\n"
+        if self._queries_summary is None:
+            self._queries_summary = [
+                (query.get('room_name', '未知房间'), len(query.get('recipients', [])))
+                for query in self.get('queries', [])
+            ]
+        summary += f"监控房间数: {len(self._queries_summary)}\n"
 
-        if queries:
+        if self._queries_summary:
             summary += "房间列表:\n"
-            for i, query in enumerate(queries):
-                room = query.get('room_name', '未知房间')
-                recipients = len(query.get('recipients', []))
-                summary += f"  {i + 1}. {room} (收件人: {recipients})\n"
+            for i, (room, recipients) in enumerate(self._queries_summary, 1):
+                summary += f"  {i}. {room} (收件人: {recipients})\n"
 
-        return summary
\ No newline at end of file
+        return summary.rstrip("\n")
\ No newline at end of file
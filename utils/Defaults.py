@@ -1,4 +1,5 @@
 import datetime
+import functools
 import socket
 
 # 内嵌的默认 Schema
@@ -213,15 +214,13 @@ def generate_report_email(room_name, days, cid, stats):
     """
   return html_content
 
-def generate_html_email(roomname, balance, min_balance):
-    # 主题色 - 科技蓝
-    theme_color = "#3498db"
-    # 警告色 - 红色
-    alert_color = "#e74c3c"
-
-    current_host = get_hostname()
+# 主题色 - 科技蓝
+_THEME_COLOR = "#3498db"
+# 警告色 - 红色
+_ALERT_COLOR = "#e74c3c"
 
-    html_content = f"""
+# HTML 告警邮件模板，固定的配色在模块加载时直接写入，发送时只填充房间、余额等变量
+_HTML_EMAIL_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -278,19 +277,33 @@ def generate_html_email(roomname, balance, min_balance):
 
         <!-- 页脚 -->
         <div style="background-color: #f5f5f5; padding: 20px; text-align: center; font-size: 13px; color: #999; border-top: 1px solid #eee;">
-            <p style="margin: 5px 0;">UESTC-Energyfy &copy; {datetime.datetime.now().year}</p>
-            <p style="margin: 5px 0 0; font-size: 11px; color: #ccc;">Server: {current_host}</p>
+            <p style="margin: 5px 0;">UESTC-Energyfy &copy; {year}</p>
+            <p style="margin: 5px 0 0; font-size: 11px; color: #ccc;">Server: {host}</p>
         </div>
         </div>
     </div>
 </body>
 </html>
-    """
-    return html_content
+    """.replace("{theme_color}", _THEME_COLOR).replace("{alert_color}", _ALERT_COLOR)
 
-def generate_text_email(roomname, balance, min_balance):
-    current_host = get_hostname()
-    text_content = f"""
+
+def generate_html_email(roomname, balance, min_balance):
+    return _render_html_email(roomname, balance, min_balance, datetime.datetime.now().year, get_hostname())
+
+
+@functools.lru_cache(maxsize=32)
+def _render_html_email(roomname, balance, min_balance, year, host):
+    """渲染HTML告警邮件；年份与主机名作为参数参与缓存键，保证缓存结果不会过期"""
+    return _HTML_EMAIL_TEMPLATE.format(
+        roomname=roomname,
+        balance=balance,
+        min_balance=min_balance,
+        year=year,
+        host=host
+    )
+
+# 纯文本告警邮件模板，模块加载时构建一次，发送时只填充变量
+_TEXT_EMAIL_TEMPLATE = """
 UESTC-Energyfy 余额告警通知
 ========================================
 
@@ -312,15 +325,13 @@ UESTC-Energyfy 余额告警通知
 
 ========================================
 本邮件为系统自动发送，请勿直接回复
-UESTC-Energyfy © {datetime.datetime.now().year}
-Server: {current_host}
+UESTC-Energyfy © {year}
+Server: {host}
 ========================================
-"""
-    return text_content.strip()
+""".strip()
 
-def generate_markdown_notification(roomname, balance, min_balance):
-    current_host = get_hostname()
-    markdown_content = f"""
+# Server酱 Markdown 告警模板
+_MARKDOWN_NOTIFICATION_TEMPLATE = """
 # ⚡ UESTC-Energyfy 余额告警通知
 
 ---
@@ -347,8 +358,25 @@ def generate_markdown_notification(roomname, balance, min_balance):
 
 ---
 
-UESTC-Energyfy © {datetime.datetime.now().year} 
+UESTC-Energyfy © {year} 
+
+Server: {host}
+""".strip()
 
-Server: {current_host}
-"""
-    return markdown_content.strip()
\ No newline at end of file
+def generate_text_email(roomname, balance, min_balance):
+    return _TEXT_EMAIL_TEMPLATE.format(
+        roomname=roomname,
+        balance=balance,
+        min_balance=min_balance,
+        year=datetime.datetime.now().year,
+        host=get_hostname()
+    )
+
+def generate_markdown_notification(roomname, balance, min_balance):
+    return _MARKDOWN_NOTIFICATION_TEMPLATE.format(
+        roomname=roomname,
+        balance=balance,
+        min_balance=min_balance,
+        year=datetime.datetime.now().year,
+        host=get_hostname()
+    )
@@ -1,6 +1,8 @@
+import atexit
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 import threading
 
 
@@ -36,16 +38,20 @@ class Logger:
         fmt = fmt or '%(asctime)s | %(levelname)-8s | %(message)s'
         datefmt = datefmt or '%Y-%m-%d %H:%M:%S'
         formatter = logging.Formatter(fmt, datefmt)
+        handlers = []
 
         # 控制台处理器
         if log_to_console:
             console_handler = logging.StreamHandler()
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
 
         # 文件处理器（带轮转）
         if log_to_file:
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            # 日志目录通常已存在，先做一次轻量检查；仅文件名时无需创建目录
+            log_dir = os.path.dirname(log_file)
+            if log_dir and not os.path.isdir(log_dir):
+                os.makedirs(log_dir, exist_ok=True)
             file_handler = TimedRotatingFileHandler(
                 filename=log_file,
                 when=when,
@@ -53,11 +59,25 @@ class Logger:
                 encoding='utf-8'
             )
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
+
+        # 实际的输出处理器由后台线程驱动，调用方只需把日志记录放入队列，
+        # 不会阻塞在控制台/文件写入与日志轮转上；进程退出时停止监听并写完剩余日志
+        self._listener = None
+        if handlers:
+            log_queue = queue.SimpleQueue()
+            self.logger.addHandler(QueueHandler(log_queue))
+            self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+            self._listener.start()
+            atexit.register(self._listener.stop)
 
         # 防止重复初始化
         self._initialized = True
 
+    def isEnabledFor(self, level):
+        """判断指定级别的日志是否会被输出，用于跳过昂贵的日志参数构造"""
+        return self.logger.isEnabledFor(level)
+
     # 日志方法
     def debug(self, msg, *args, **kwargs):
         self.logger.debug(msg, *args, **kwargs)
@@ -78,19 +98,32 @@ class Logger:
         self.logger.exception(msg, *args, **kwargs)
 
 
-# 全局访问点
+# 全局访问点，实例创建后直接读取模块变量，无需加锁
+_LOGGER = None
+_LOGGER_LOCK = threading.Lock()
+
+
 def get_logger(name="Energyfy", log_level=logging.INFO,
                log_to_console=True, log_to_file=True,
                log_file="logs/Energyfy.log", backup_count=7):
     """获取全局日志实例，支持重载配置"""
-    if Logger._instance is None:
-        # 如果实例未初始化，使用传入的配置初始化 Logger
-        Logger(
-            name=name,
-            log_level=log_level,
-            log_to_console=log_to_console,
-            log_to_file=log_to_file,
-            log_file=log_file,
-            backup_count=backup_count
-        )
-    return Logger._instance
+    logger = _LOGGER
+    if logger is not None:
+        return logger
+    return _init_logger(name, log_level, log_to_console, log_to_file, log_file, backup_count)
+
+
+def _init_logger(name, log_level, log_to_console, log_to_file, log_file, backup_count):
+    """首次获取日志实例时，使用传入的配置初始化 Logger 并发布到模块变量"""
+    global _LOGGER
+    with _LOGGER_LOCK:
+        if _LOGGER is None:
+            _LOGGER = Logger(
+                name=name,
+                log_level=log_level,
+                log_to_console=log_to_console,
+                log_to_file=log_to_file,
+                log_file=log_file,
+                backup_count=backup_count
+            )
+        return _LOGGER
@@ -1,11 +1,71 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
 import requests
-import json
 from utils.Logger import get_logger
 
+# SMTP连接空闲超过该时长（秒）后不再复用，服务器通常会主动断开长时间空闲的连接
+SMTP_IDLE_TIMEOUT = 100
+
+
+# 常见图片格式的文件头，用于确定内嵌图片的 MIME 子类型
+_IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+def _image_subtype(data):
+    """根据文件头识别图片的 MIME 子类型，无法识别时返回None"""
+    for signature, subtype in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return subtype
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _http_error_message(e):
+    """提取服务器返回的错误信息，构造HTTP错误描述"""
+    try:
+        error_detail = e.response.json().get('message', '无详细错误信息')
+    except:
+        error_detail = e.response.text
+    return f"Server酱推送失败: HTTP错误 {e.response.status_code} - {error_detail}"
+
+
+# Server酱请求异常类型 -> 错误描述，按异常类的MRO查找，子类优先
+_ERR_MAP = {
+    requests.exceptions.HTTPError: _http_error_message,
+    requests.exceptions.ConnectionError: lambda e: "网络连接错误",
+    requests.exceptions.Timeout: lambda e: "请求超时",
+    requests.exceptions.RequestException: lambda e: "请求异常",
+}
+
+
+def _server_chan_error_message(e):
+    """根据 requests 异常类型返回对应的错误描述"""
+    for cls in type(e).__mro__:
+        describe = _ERR_MAP.get(cls)
+        if describe is not None:
+            return describe(e)
+    return "Server酱推送失败"
+
+
+class EmailConfig(NamedTuple):
+    """SMTP邮件配置，字段固定，按属性访问"""
+    host: str
+    port: int
+    encryption: str
+    username: str
+    password: str
+    sender: str
+
+
 class NotificationManager:
     def __init__(self, email_host=None, email_port=None, encryption='none',
                  email_username=None, email_password=None, email_sender=None):
@@ -20,15 +80,127 @@ class NotificationManager:
         """
         self.logger = get_logger()
         self.logger.debug("[NotificationManager] 初始化通知管理器")
-        self.email_config = {
-            'host': email_host,
-            'port': email_port,
-            'encryption': encryption,
-            'username': email_username,
-            'password': email_password,
-            'sender': email_sender
-        }
-        self.logger.debug("[NotificationManager] 邮件配置: %s", self.email_config)
+        self.email_config = EmailConfig(
+            host=email_host,
+            port=email_port,
+            encryption=encryption,
+            username=email_username,
+            password=email_password,
+            sender=email_sender
+        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            # 邮件配置的 repr 仅在调试时构造
+            self.logger.debug("[NotificationManager] 邮件配置: %s", self.email_config)
+
+        # 缓存的SMTP连接，多次 send_email 之间保持打开，close() 或退出 smtp_session() 时关闭
+        self._smtp = None
+        self._smtp_last_used = 0.0
+        self._smtp_sessions = 0
+        self._smtp_lock = threading.Lock()
+
+        # Server酱推送复用同一个HTTP会话，对同一推送主机保持keep-alive连接
+        self._session = requests.Session()
+
+    def _connect_smtp(self):
+        """
+        建立SMTP连接，完成加密协商与登录
+        :return: 已登录的 smtplib.SMTP 对象
+        """
+        # smtplib 仅在真正发送邮件时才需要，推迟导入以加快启动
+        import smtplib
+
+        cfg = self.email_config
+        host, port, encryption = cfg.host, cfg.port, cfg.encryption
+        dbg = self.logger.debug
+        dbg("[NMngr._connect_smtp] 连接SMTP服务器: host=%s, port=%s, encryption=%s", host, port, encryption)
+
+        # 根据加密方式创建连接
+        if encryption == 'ssl':
+            server = smtplib.SMTP_SSL(host, port)
+        else:
+            server = smtplib.SMTP(host, port)
+            if encryption == 'tls':
+                dbg("[NMngr._connect_smtp] 启用TLS加密")
+                server.starttls()
+
+        dbg("[NMngr._connect_smtp] 登录SMTP服务器: username=%s", cfg.username)
+        server.login(cfg.username, cfg.password)
+        return server
+
+    def _close_smtp(self):
+        """关闭会话中缓存的SMTP连接（调用方需持有 _smtp_lock）"""
+        if self._smtp is None:
+            return
+
+        import smtplib
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+        self.logger.debug("[NMngr._close_smtp] SMTP连接已关闭")
+
+    def _get_server(self):
+        """获取可复用的SMTP连接，空闲超时或已断开时重新建立（调用方需持有 _smtp_lock）"""
+        import smtplib
+
+        if self._smtp is not None:
+            if time.monotonic() - self._smtp_last_used > SMTP_IDLE_TIMEOUT:
+                self.logger.debug("[NMngr._get_server] 连接空闲超时，重新连接")
+                self._close_smtp()
+            else:
+                try:
+                    # 复用前重置会话状态，同时探测连接是否仍然可用
+                    self._smtp.rset()
+                except smtplib.SMTPServerDisconnected:
+                    self.logger.debug("[NMngr._get_server] 连接已被服务器断开，重新连接")
+                    self._smtp = None
+
+        if self._smtp is None:
+            self._smtp = self._connect_smtp()
+        return self._smtp
+
+    def _send_message(self, recipients, msg):
+        """
+        通过缓存的SMTP连接发送邮件；复用的连接已失效时由 _get_server() 的 RSET 探测发现并重新连接
+        :param recipients: 收件人列表
+        :param msg: 已构建好的邮件对象
+        """
+        sender = self.email_config.sender
+        with self._smtp_lock:
+            server = self._get_server()
+            self.logger.debug("[NMngr._send_message] 发送邮件...")
+            try:
+                # 由 smtplib 直接以字节形式序列化邮件，省去 as_string() 的中间字符串
+                server.send_message(msg, from_addr=sender, to_addrs=recipients)
+            except Exception:
+                # 邮件交给服务器后才断开时服务器可能已接收该邮件，不再重试以免重复告警；
+                # 连接状态未知，丢弃后由下一封邮件重新建立
+                self._close_smtp()
+                raise
+            self._smtp_last_used = time.monotonic()
+
+    def close(self):
+        """关闭缓存的SMTP连接与Server酱HTTP会话，之后的发送会按需重新连接"""
+        with self._smtp_lock:
+            self._close_smtp()
+        self._session.close()
+
+    @contextmanager
+    def smtp_session(self):
+        """
+        SMTP会话上下文，退出最外层上下文时关闭缓存的连接。
+        上下文内的所有 send_email 调用复用同一个连接，支持嵌套与多线程并发调用。
+        """
+        with self._smtp_lock:
+            self._smtp_sessions += 1
+        try:
+            yield self
+        finally:
+            with self._smtp_lock:
+                self._smtp_sessions -= 1
+                if self._smtp_sessions == 0:
+                    self._close_smtp()
 
     def send_email(self, recipients, subject, text_content=None, html_content=None, images=None):
         """
@@ -41,10 +213,16 @@ class NotificationManager:
         :raises: ValueError - 当配置不完整或参数无效时
         :raises: RuntimeError - 当发送过程中出现错误时
         """
-        self.logger.debug("[NMngr.send_email] 准备发送邮件: subject=%s, recipients=%s", subject, recipients)
+        import smtplib
+        from email.message import EmailMessage
+
+        cfg = self.email_config
+        dbg = self.logger.debug
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        dbg("[NMngr.send_email] 准备发送邮件: subject=%s, recipients=%s", subject, recipients)
 
         # 检查邮件配置是否完整
-        missing_configs = [k for k, v in self.email_config.items() if v is None]
+        missing_configs = [k for k, v in zip(cfg._fields, cfg) if v is None]
         if missing_configs:
             raise ValueError(f"邮件配置不完整，缺少以下参数: {', '.join(missing_configs)}")
 
@@ -62,78 +240,52 @@ class NotificationManager:
         elif not isinstance(recipients, list):
             raise TypeError("收件人必须是字符串或字符串列表")
 
-        self.logger.debug("[NMngr.send_email] 收件人处理完成: %s", recipients)
+        dbg("[NMngr.send_email] 收件人处理完成: %s", recipients)
 
         # 创建邮件对象
-        # 如果有图片，根容器必须是 related；否则只需 alternative
-        if images:
-            msg = MIMEMultipart('related')
-            msg_alternative = MIMEMultipart('alternative')
-            msg.attach(msg_alternative)
-        else:
-            msg = MIMEMultipart('alternative')
-            msg_alternative = msg
-
+        msg = EmailMessage()
         msg['Subject'] = subject
-        msg['From'] = self.email_config['sender']
+        msg['From'] = cfg.sender
         msg['To'] = ', '.join(recipients)
 
-        # 添加邮件正文内容
+        # 添加邮件正文内容，同时存在时组成 multipart/alternative
+        # 与原先的 MIMEText 一致使用 base64 传输编码，保证报文为纯ASCII
         if text_content:
-            self.logger.debug("[NMngr.send_email] 添加纯文本内容 (%d 字符)", len(text_content))
-            part1 = MIMEText(text_content, 'plain', 'utf-8')
-            msg_alternative.attach(part1)
+            if debug:
+                dbg("[NMngr.send_email] 添加纯文本内容 (%d 字符)", len(text_content))
+            msg.set_content(text_content, cte='base64')
 
         if html_content:
-            self.logger.debug("[NMngr.send_email] 添加HTML内容 (%d 字符)", len(html_content))
-            part2 = MIMEText(html_content, 'html', 'utf-8')
-            msg_alternative.attach(part2)
+            if debug:
+                dbg("[NMngr.send_email] 添加HTML内容 (%d 字符)", len(html_content))
+            if text_content:
+                msg.add_alternative(html_content, subtype='html', cte='base64')
+            else:
+                msg.set_content(html_content, subtype='html', cte='base64')
 
-        # 添加图片 (挂载到 related 根容器)
+        # 添加图片，挂载到HTML正文（无HTML时为纯文本正文），该部分自动转换为 multipart/related
+        # 找不到正文部分时与原先一致，直接挂载到邮件本身（顶层 multipart/related）
         if images:
+            body = msg.get_body(preferencelist=('html', 'plain'))
+            if body is None:
+                body = msg
             for cid, img_data in images.items():
                 try:
-                    img = MIMEImage(img_data)
-                    img.add_header('Content-ID', f'<{cid}>')  # 尖括号是必须的
-                    img.add_header('Content-Disposition', 'inline')
-                    msg.attach(img)
-                    self.logger.debug(f"[NMngr.send_email] 已附加图片 CID: {cid}")
+                    subtype = _image_subtype(img_data)
+                    if subtype is None:
+                        raise TypeError("无法识别图片格式")
+                    body.add_related(
+                        img_data, maintype='image', subtype=subtype,
+                        cid=f'<{cid}>',  # 尖括号是必须的
+                        disposition='inline'
+                    )
+                    dbg("[NMngr.send_email] 已附加图片 CID: %s", cid)
                 except Exception as e:
-                    self.logger.warning(f"附加图片失败: {e}")
+                    self.logger.warning("附加图片失败: %s", e)
 
         try:
-            self.logger.debug("[NMngr.send_email] 连接SMTP服务器: host=%s, port=%s, encryption=%s",
-                              self.email_config['host'], self.email_config['port'], self.email_config['encryption'])
-
-            # 根据加密方式创建连接
-            if self.email_config['encryption'] == 'ssl':
-                server = smtplib.SMTP_SSL(
-                    self.email_config['host'],
-                    self.email_config['port']
-                )
-            else:
-                server = smtplib.SMTP(
-                    self.email_config['host'],
-                    self.email_config['port']
-                )
-                if self.email_config['encryption'] == 'tls':
-                    self.logger.debug("[NMngr.send_email] 启用TLS加密")
-                    server.starttls()
-
-            # 登录并发送
-            self.logger.debug("[NMngr.send_email] 登录SMTP服务器: username=%s", self.email_config['username'])
-            server.login(
-                self.email_config['username'],
-                self.email_config['password']
-            )
-            self.logger.debug("[NMngr.send_email] 发送邮件...")
-            server.sendmail(
-                self.email_config['sender'],
-                recipients,
-                msg.as_string()
-            )
-            server.quit()
-            self.logger.debug("[NMngr.send_email] 邮件发送成功")
+            self._send_message(recipients, msg)
+            dbg("[NMngr.send_email] 邮件发送成功")
             return True
         except smtplib.SMTPException as e:
             raise RuntimeError("SMTP协议错误") from e
@@ -182,34 +334,25 @@ class NotificationManager:
         if short:
             payload['short'] = short
 
-        self.logger.debug("[NMngr.send_server_chan] 请求URL: %s", url)
-        self.logger.debug("[NMngr.send_server_chan] 请求数据: %s", payload)
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug("[NMngr.send_server_chan] 请求URL: %s", url)
+            self.logger.debug("[NMngr.send_server_chan] 请求数据: %s", payload)
 
-        # 发送请求
-        headers = {'Content-Type': 'application/json'}
+        # 发送请求，由 requests 负责序列化 JSON 并设置 Content-Type
         try:
-            response = requests.post(
+            response = self._session.post(
                 url,
-                data=json.dumps(payload),
-                headers=headers,
+                json=payload,
                 timeout=10
             )
             self.logger.debug("[NMngr.send_server_chan] HTTP响应状态码: %s", response.status_code)
             response.raise_for_status()  # 检查HTTP错误
-            self.logger.debug("[NMngr.send_server_chan] 推送成功: %s", response.text)
+            if debug:
+                # response.text 需要解码响应体，仅在调试时读取
+                self.logger.debug("[NMngr.send_server_chan] 推送成功: %s", response.text)
             return response.json()
-        except requests.exceptions.HTTPError as e:
-            # 提取服务器返回的错误信息
-            try:
-                error_detail = e.response.json().get('message', '无详细错误信息')
-            except:
-                error_detail = e.response.text
-            raise RuntimeError(f"Server酱推送失败: HTTP错误 {e.response.status_code} - {error_detail}") from e
-        except requests.exceptions.ConnectionError as e:
-            raise RuntimeError("网络连接错误") from e
-        except requests.exceptions.Timeout as e:
-            raise RuntimeError("请求超时") from e
         except requests.exceptions.RequestException as e:
-            raise RuntimeError("请求异常") from e
+            raise RuntimeError(_server_chan_error_message(e)) from e
         except Exception as e:
             raise RuntimeError("Server酱推送失败") from e
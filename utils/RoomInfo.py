@@ -1,11 +1,32 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import execjs
 from bs4 import BeautifulSoup
 import re
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
 from utils.Logger import get_logger
 
+# 登录页解析优先使用 lxml（C实现，明显快于纯Python的 html.parser），未安装时回退
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = 'lxml'
+except ImportError:
+    _HTML_PARSER = 'html.parser'
+
+# 分批查询时同时在途的最大请求数，避免对门户接口造成过大压力
+_MAX_CONCURRENT_CHUNKS = 4
+
+# 登录页中加密JS的 script 标签地址
+_ENCRYPT_JS_RE = re.compile(r'/authserver/uestcTheme/static/common/encrypt\.js\?v=.*')
+
 class RoomInfo:
+    # 加密JS随 ?v= 版本号变化，按URL缓存源码，按源码摘要缓存编译后的执行上下文，进程内所有实例共享
+    _JS_CODE_CACHE = {}
+    _JS_CTX_CACHE = {}
 
     def __init__(self, username, password):
         self.USERNAME = username
@@ -17,33 +38,61 @@ class RoomInfo:
         self.INFO_API = f"{self.EPORTAL_BASE_URL}/qljfwapp/sys/lwUestcDormElecPrepaid/dormElecPrepaidMan/queryRoomInfo.do"
         self.logger = get_logger()
 
+        # 整个生命周期复用同一个会话，保持与认证/门户服务器的keep-alive连接
+        self.session = requests.Session()
+        # 会话中是否持有上次登录得到的认证cookie，持有时先直接查询，失效后才重新登录
+        self._authenticated = False
+        # 只访问认证与门户两个主机，少量主机池即可；单主机允许较多连接，以便并发查询时复用连接而不是频繁新建
+        self._adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+            'Connection': 'keep-alive'
+        })
+
         self.logger.debug("[RoomInfo] 初始化 -> 用户名: %s", username)
 
     def get_dynamic_js(self, session):
         """
-        从登录页面动态获取加密JS代码
+        获取登录页面并从中动态获取加密JS代码
+        访问目标页面会被重定向到带 service 参数的统一认证登录页，该页面同时包含加密JS地址与登录表单参数，
+        因此只请求并解析一次，解析结果交给调用方继续提取 execution 等字段
         :param session: 已创建的 requests.Session 对象
-        :return: 加密JS代码字符串
+        :return: (登录页 BeautifulSoup 对象, 加密JS代码字符串)
         :raises RuntimeError: 无法找到加密JS文件或请求失败时抛出
         """
-        self.logger.debug("[RoomInfo.get_dynamic_js] 请求登录页: %s", self.LOGIN_URL)
+        self.logger.debug("[RoomInfo.get_dynamic_js] 请求登录页: %s", self.TARGET_URL)
         try:
-            login_page = session.get(self.LOGIN_URL)
+            login_page = session.get(self.TARGET_URL)
             login_page.raise_for_status()
-            soup = BeautifulSoup(login_page.text, 'html.parser')
+            soup = BeautifulSoup(login_page.content, _HTML_PARSER)
 
             # 查找加密JS的script标签
-            js_script = soup.find('script', {'src': re.compile(r'/authserver/uestcTheme/static/common/encrypt\.js\?v=.*')})
+            js_script = soup.find('script', {'src': _ENCRYPT_JS_RE})
             if not js_script:
                 raise RuntimeError("无法找到加密JS文件")
 
-            js_url = self.BASE_URL + js_script['src']
+            js_url = urljoin(login_page.url, js_script['src'])
             self.logger.debug("[RoomInfo.get_dynamic_js] 解析到JS文件URL: %s", js_url)
 
+            js_code = RoomInfo._JS_CODE_CACHE.get(js_url)
+            if js_code is not None:
+                self.logger.debug("[RoomInfo.get_dynamic_js] JS版本未变化，使用缓存的加密JS")
+                return soup, js_code
+
             js_response = session.get(js_url)
             js_response.raise_for_status()
-            self.logger.debug("[RoomInfo.get_dynamic_js] 成功获取加密JS，长度: %s", len(js_response.text))
-            return js_response.text
+            js_code = js_response.text
+            self.logger.debug("[RoomInfo.get_dynamic_js] 成功获取加密JS，长度: %s", len(js_code))
+            RoomInfo._JS_CODE_CACHE[js_url] = js_code
+            return soup, js_code
         except requests.exceptions.RequestException as e:
             raise RuntimeError("请求加密JS失败") from e
         except Exception as e:
@@ -57,6 +106,12 @@ class RoomInfo:
         :return: execjs 编译后的执行上下文对象
         :raises RuntimeError: JS 编译失败时抛出
         """
+        key = hashlib.blake2b(js_code.encode('utf-8'), digest_size=16).digest()
+        ctx = RoomInfo._JS_CTX_CACHE.get(key)
+        if ctx is not None:
+            self.logger.debug("[RoomInfo.create_js_context] 使用缓存的JS执行环境")
+            return ctx
+
         self.logger.debug("[RoomInfo.create_js_context] 编译加密JS...")
         # 添加暴露给Python的辅助函数
         js_code += """
@@ -68,22 +123,24 @@ class RoomInfo:
         try:
             ctx = execjs.compile(js_code)
             self.logger.debug("[RoomInfo.create_js_context] 编译成功 (默认环境)")
-            return ctx
         except Exception as e:
             try:
                 ctx = execjs.get("Node").compile(js_code)
                 self.logger.debug("[RoomInfo.create_js_context] 编译成功 (Node 环境)")
-                return ctx
             except Exception as e2:
                 raise RuntimeError("JS 编译错误（默认环境和 Node 都失败）") from e2
 
+        RoomInfo._JS_CTX_CACHE[key] = ctx
+        return ctx
+
 
-    def follow_redirects(self, session, start_url, max_redirects=10):
+    def follow_redirects(self, session, start_url, max_redirects=10, capture_history=False):
         """
         手动跟随HTTP重定向链
         :param session: requests.Session 对象
         :param start_url: 起始URL
         :param max_redirects: 最大重定向次数（默认10）
+        :param capture_history: 是否在历史中记录每一跳的响应头与cookie快照（仅调试时需要，默认只记录URL与状态码）
         :return: (最终响应对象, 重定向历史列表)
         :raises RuntimeError: 请求失败、缺少Location头或超过最大重定向次数时抛出
         """
@@ -100,28 +157,23 @@ class RoomInfo:
                 response.raise_for_status()
 
                 # 记录重定向历史
-                redirect_history.append({
-                    'url': current_url,
-                    'status': response.status_code,
-                    'headers': dict(response.headers),
-                    'cookies': session.cookies.get_dict()
-                })
+                if capture_history:
+                    redirect_history.append({
+                        'url': current_url,
+                        'status': response.status_code,
+                        'headers': dict(response.headers),
+                        'cookies': session.cookies.get_dict()
+                    })
+                else:
+                    redirect_history.append({'url': current_url, 'status': response.status_code})
 
                 # 检查是否是重定向
                 if response.status_code in (301, 302, 303, 307, 308):
                     redirect_count += 1
                     self.logger.debug("[RoomInfo.follow_redirects] 第 %s 次重定向: %s", redirect_count, current_url)
                     if 'Location' in response.headers:
-                        # 处理相对路径URL
-                        location = response.headers['Location']
-                        if not location.startswith('http'):
-                            if location.startswith('/'):
-                                location = self.BASE_URL + location
-                            else:
-                                # 从当前URL解析基础路径
-                                base_url = '/'.join(current_url.split('/')[:3])
-                                location = base_url + '/' + location
-                        current_url = location
+                        # 按 RFC 3986 相对当前URL解析（绝对路径、相对路径、//host 及仅查询串的情况）
+                        current_url = urljoin(current_url, response.headers['Location'])
                     else:
                         raise RuntimeError("重定向响应缺少Location头")
                 else:
@@ -142,26 +194,17 @@ class RoomInfo:
         :raises RuntimeError: 初始化环境失败、登录失败或请求异常时抛出
         """
         self.logger.debug("[RoomInfo.login] 开始执行登录流程")
-        session = requests.Session()
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Connection': 'keep-alive'
-        }
-        session.headers.update(headers)
+        session = self.session
+        # 复用连接池，但每次登录都从干净的cookie状态开始
+        session.cookies.clear()
+        self._authenticated = False
 
         try:
-            # 获取动态JS代码
-            js_content = self.get_dynamic_js(session)
+            # 获取登录页面与动态JS代码
+            soup, js_content = self.get_dynamic_js(session)
             js_ctx = self.create_js_context(js_content)
 
-            # 重新获取登录页面
-            login_page = session.get(self.TARGET_URL)
-            login_page.raise_for_status()
-            soup = BeautifulSoup(login_page.text, 'html.parser')
-
-            # 提取参数
+            # 从同一登录页面提取参数
             execution = soup.find('input', {'name': 'execution'})
             if not execution:
                 raise ValueError("无法找到execution参数")
@@ -218,56 +261,39 @@ class RoomInfo:
             final_response, redirect_history = self.follow_redirects(session, redirect_url)
             self.logger.debug("[RoomInfo.login] 最终响应URL: %s", final_response.url)
 
+            self._authenticated = True
             # 返回最终响应、重定向历史和所有cookie
             return final_response, session.cookies.get_dict(), redirect_history
         except requests.exceptions.RequestException as e:
             raise RuntimeError("登录请求失败") from e
 
-    def get(self, queries):
+    def get(self, queries, chunk_size=32):
         """
-        根据宿舍ID查询电费信息
+        根据宿舍ID批量查询电费信息
         :param queries: 宿舍ID列表或可迭代对象
+        :param chunk_size: 单次请求包含的最大宿舍数，所有宿舍在一次登录会话内分批并发查询
         :return: [(宿舍ID字符串, 宿舍信息字典或None), ...]
         :raises RuntimeError: 登录失败、请求失败或响应异常时抛出
         """
+        queries = list(queries)
         self.logger.debug("[RoomInfo.get] 开始查询宿舍列表: %s", queries)
         try:
+            # 上次登录的会话通常仍然有效，先直接查询，省去整条登录与重定向链
+            if self._authenticated:
+                result = self._query_all(queries, chunk_size)
+                if result is not None:
+                    return result
+                self.logger.debug("[RoomInfo.get] 会话已失效，重新登录")
+
             final_response, cookies, redirect_history = self.login()
 
             if not final_response or not cookies:
                 raise RuntimeError("登录失败，未获取有效会话")
 
-            # 构造批量 roomIds 参数
-            room_ids_list = [{"DORM_ID": str(q)} for q in queries]
-            payload = {
-                "roomIds": json.dumps(room_ids_list, ensure_ascii=False)
-            }
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-            }
-
-            # 发送请求
-            response = requests.post(
-                self.INFO_API,
-                data=payload,
-                headers=headers,
-                cookies=cookies
-            )
-            response.raise_for_status()
-
-            response_list = response.json()
-            result = []
-
-            for query, item in zip(queries, response_list):
-                room_info = item.get('roomInfo', {})
-                if room_info.get('retcode') == 0:
-                    self.logger.debug("[RoomInfo.get] 宿舍 %s 查询成功 -> 余额: %s", query, room_info.get("syje"))
-                    result.append((str(query), room_info))
-                else:
-                    self.logger.debug("[RoomInfo.get] 宿舍 %s 查询失败: %s", query, room_info.get("msg"))
-                    self.logger.warning(f"RoomInfo: 获取宿舍 {query} 信息失败: {room_info.get('msg')}")
-                    result.append((str(query), None))
-
+            result = self._query_all(queries, chunk_size)
+            if result is None:
+                self._authenticated = False
+                raise RuntimeError("登录失败，未获取有效会话")
             return result
 
         except requests.exceptions.RequestException as e:
@@ -275,3 +301,88 @@ class RoomInfo:
         except Exception as e:
             raise RuntimeError("获取宿舍信息时出错") from e
 
+    def _query_all(self, queries, chunk_size):
+        """
+        在当前会话内分批查询全部宿舍
+        :param queries: 宿舍ID列表
+        :param chunk_size: 单次请求包含的最大宿舍数
+        :return: [(宿舍ID字符串, 宿舍信息字典或None), ...]；会话未认证时返回 None
+        """
+        chunks = [queries[start:start + chunk_size] for start in range(0, len(queries), chunk_size)]
+        if len(chunks) <= 1:
+            return self._query_rooms(chunks[0]) if chunks else []
+
+        # 各批次互不依赖，限制并发数同时发出；map 按提交顺序返回，合并后与 queries 顺序一致
+        # requests.Session 不保证线程安全，每个批次使用携带认证cookie副本的独立会话
+        self.logger.debug("[RoomInfo._query_all] 分 %d 批并发查询 %d 个宿舍", len(chunks), len(queries))
+        sessions = [self._fork_session() for _ in chunks]
+        with ThreadPoolExecutor(max_workers=min(_MAX_CONCURRENT_CHUNKS, len(chunks))) as executor:
+            chunk_results = list(executor.map(self._query_rooms, chunks, sessions))
+
+        result = []
+        for rooms in chunk_results:
+            if rooms is None:
+                return None
+            result.extend(rooms)
+        return result
+
+    def _fork_session(self):
+        """
+        创建用于并发查询的独立会话：复制主会话的请求头与cookie，共用同一个连接池适配器（urllib3 连接池线程安全）
+        查询响应中设置的cookie只写入副本，不影响主会话
+        :return: requests.Session 对象
+        """
+        session = requests.Session()
+        session.headers.update(self.session.headers)
+        session.cookies = self.session.cookies.copy()
+        session.mount('http://', self._adapter)
+        session.mount('https://', self._adapter)
+        return session
+
+    def _query_rooms(self, queries, session=None):
+        """
+        通过一次请求查询一批宿舍的电费信息，认证cookie由登录后的会话自动携带
+        :param queries: 宿舍ID列表
+        :param session: 发送请求使用的会话，默认为主会话
+        :return: [(宿舍ID字符串, 宿舍信息字典或None), ...]；会话未认证或已过期时返回 None
+        """
+        # 构造批量 roomIds 参数
+        room_ids_list = [{"DORM_ID": str(q)} for q in queries]
+        payload = {
+            "roomIds": json.dumps(room_ids_list, ensure_ascii=False)
+        }
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+        }
+
+        # 发送请求（禁用重定向：会话过期时接口会跳转到统一认证登录页）
+        response = (session or self.session).post(
+            self.INFO_API,
+            data=payload,
+            headers=headers,
+            allow_redirects=False
+        )
+        if response.status_code in (301, 302, 303, 307, 308, 401):
+            return None
+        response.raise_for_status()
+
+        try:
+            response_list = response.json()
+        except ValueError:
+            # 返回的不是JSON（通常是登录页HTML），视为会话失效
+            return None
+        if not isinstance(response_list, list):
+            return None
+        result = []
+
+        for query, item in zip(queries, response_list):
+            room_info = item.get('roomInfo', {})
+            if room_info.get('retcode') == 0:
+                self.logger.debug("[RoomInfo._query_rooms] 宿舍 %s 查询成功 -> 余额: %s", query, room_info.get("syje"))
+                result.append((str(query), room_info))
+            else:
+                self.logger.debug("[RoomInfo._query_rooms] 宿舍 %s 查询失败: %s", query, room_info.get("msg"))
+                self.logger.warning(f"RoomInfo: 获取宿舍 {query} 信息失败: {room_info.get('msg')}")
+                result.append((str(query), None))
+
+        return result
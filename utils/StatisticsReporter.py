@@ -1,30 +1,185 @@
+import atexit
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import re
 import os
 import io
+import mmap
 import json
 import datetime
-import matplotlib
+import functools
+import gzip
+import lzma
 import logging
 import platform
-
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import random
 import warnings
-warnings.filterwarnings(
-    "ignore",
-    message=r"Glyph .* missing from font\(s\) .*",
-    category=UserWarning
-)
-import matplotlib.dates as mdates
-from matplotlib import font_manager
 
 from utils import Defaults
 from utils.Logger import get_logger
 from utils.NotificationManager import NotificationManager
 
 
+# 余额日志行: "<时间> | INFO | 房间 <房间名> 当前余额: <余额>元..."，一次匹配同时取出时间、房间名与余额
+# 日志行总以时间开头，从行首锚定匹配；直接作用于日志文件字节，各部分之间只允许空格/制表符，不会跨行
+_BALANCE_LINE_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})[^\n]*?房间[ \t]+([^\n]+?)[ \t]+当前余额:[ \t]*([\d.]+)'.encode('utf-8')
+)
+# 余额日志行必然包含的关键字，先用 find 定位候选行，只对这些行运行正则
+_BALANCE_KEYWORD = '当前余额'.encode('utf-8')
+
+# 旧版本曾把日志解析进度写入状态文件的这个键，读取状态时丢弃（解析进度现保存在单独的文件中）
+_LEGACY_LOG_CACHE_KEY = '_log_cache'
+# 日志轮转删除旧备份后 inode 可能被新文件复用，记录文件开头字节作为指纹，不一致时从头扫描
+_HEAD_FINGERPRINT_SIZE = 64
+
+# 轮转日志被 logrotate 等工具压缩后的扩展名与对应的打开方式
+_COMPRESSED_OPENERS = {
+    '.gz': gzip.open,
+    '.xz': lzma.open,
+}
+
+# 两次检查之间的最长/最短等待时间（秒），以及附加的随机抖动上限
+_MAX_SLEEP = 3600
+_MIN_SLEEP = 60
+_SLEEP_JITTER = 30
+# 读取配置失败时的重试等待，从60秒起按指数退避，最长不超过 _MAX_SLEEP
+_RETRY_BASE = 60
+
+# 趋势图最多绘制的数据点数，点数过多时按固定步长抽样（图宽仅约1000像素，更多点只会互相重叠）
+_MAX_CHART_POINTS = 500
+
+
+# numpy 与 matplotlib（含字体管理器）导入耗时且常驻数十MB内存，推迟到首次生成报告时才导入，
+# 统计服务未启用或还没有房间到期时都不会加载
+np = None
+matplotlib = None
+Figure = None
+FigureCanvasAgg = None
+mdates = None
+font_manager = None
+_IMPORT_LOCK = threading.Lock()
+
+
+def _import_plotting():
+    """导入报告所需的 numpy 与 matplotlib（Agg 后端），已导入时直接返回"""
+    global np, matplotlib, Figure, FigureCanvasAgg, mdates, font_manager
+    if font_manager is not None:
+        return
+    with _IMPORT_LOCK:
+        if font_manager is not None:
+            return
+        import numpy as np
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        warnings.filterwarnings(
+            "ignore",
+            message=r"Glyph .* missing from font\(s\) .*",
+            category=UserWarning
+        )
+        import matplotlib.dates as mdates
+        # font_manager 最后赋值，作为全部导入完成的标志
+        from matplotlib import font_manager
+
+
+@functools.lru_cache(maxsize=1)
+def _load_chinese_font(sys_platform):
+    """
+    初始化字体：根据当前操作系统调整优先级，遍历常见中文字体列表，获取绝对路径并强制加载
+    选中的字体在进程运行期间不会变化，结果（含 matplotlib 全局参数设置）按平台缓存，只查找一次
+    :param sys_platform: platform.system() 的返回值
+    :return: 选中字体的 FontProperties
+    """
+    _import_plotting()
+    logger = get_logger()
+    # 1. 定义不同系统的推荐字体列表
+    # Windows 优先
+    windows_fonts = [
+        'Microsoft YaHei',  # 微软雅黑
+        'SimHei',  # 黑体
+        'SimSun',  # 宋体
+    ]
+
+    # Linux 优先 (Ubuntu/Debian/CentOS/Alpine)
+    linux_fonts = [
+        'WenQuanYi Micro Hei',  # 文泉驿微米黑
+        'WenQuanYi Zen Hei',  # 文泉驿正黑
+        'Noto Sans CJK SC',  # Google Noto CJK
+        'Noto Sans SC',
+        'Droid Sans Fallback',
+    ]
+
+    # MacOS 优先
+    mac_fonts = [
+        'PingFang SC',  # 苹方
+        'Hiragino Sans GB',  # 冬青黑体
+        'Heiti SC',  # 黑体-简
+    ]
+
+    # 2. 根据操作系统构建优先级列表
+    if sys_platform == 'Windows':
+        # Windows: Win字体 > Linux字体 > Mac字体
+        font_candidates = windows_fonts + linux_fonts + mac_fonts
+    elif sys_platform == 'Darwin':
+        # MacOS: Mac字体 > Win字体 > Linux字体
+        font_candidates = mac_fonts + windows_fonts + linux_fonts
+    else:
+        # Linux/Other: Linux字体 > Win字体 > Mac字体
+        font_candidates = linux_fonts + windows_fonts + mac_fonts
+
+    # 3. 获取默认回退字体路径
+    try:
+        default_prop = font_manager.FontProperties(family='sans-serif')
+        default_font_path = font_manager.findfont(default_prop)
+    except:
+        default_font_path = ""
+
+    # 4. 遍历查找
+    for font_name in font_candidates:
+        try:
+            prop = font_manager.FontProperties(family=font_name)
+            found_path = font_manager.findfont(
+                prop,
+                fallback_to_default=False
+            )
+
+            if os.path.exists(found_path) and found_path != default_font_path:
+                logger.info(f"[{sys_platform}] 统计图表选中字体: {font_name} (路径: {found_path})")
+
+                # 设置 matplotlib 全局参数
+                matplotlib.rcParams['font.family'] = 'sans-serif'
+                # 将选中的字体放在第一位，同时保留 DejaVu Sans 处理英文字符
+                matplotlib.rcParams['font.sans-serif'] = [
+                    font_name,
+                    'DejaVu Sans',
+                    'Arial',
+                    'sans-serif'
+                ]
+                matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示为方块的问题
+
+                return font_manager.FontProperties(fname=found_path)
+        except:
+            continue
+
+    logger.warning("==================================================")
+    logger.warning(f"系统 ({sys_platform}) 未检测到中文字体，统计图表中文将显示为方框！")
+    logger.warning(f"当前默认回退字体: {default_font_path}")
+
+    if sys_platform == 'Linux':
+        logger.warning("请在服务器上安装中文字体，推荐命令如下：")
+        logger.warning("  Ubuntu/Debian: sudo apt-get install fonts-wqy-microhei")
+        logger.warning("  CentOS/RHEL:   sudo yum install wqy-microhei-fonts")
+        logger.warning("  Alpine Linux:  apk add font-wqy-zenhei")
+
+    logger.warning("==================================================")
+
+    # 返回默认 fallback
+    return font_manager.FontProperties(family='sans-serif')
+
+
 class StatisticsReporter(threading.Thread):
     def __init__(self, config_reader, log_file_path, interval_days):
         """
@@ -49,214 +204,288 @@ class StatisticsReporter(threading.Thread):
             except:
                 pass
         self.state_file = os.path.join(log_dir if log_dir else '.', "stats_state.json")
-        self.font_prop = self._init_font()
+        # 日志增量解析进度与统计期内的数据点保存在状态文件旁的单独文件中，不与各房间的报告时间混在一起
+        self.log_cache_file = os.path.join(log_dir if log_dir else '.', "stats_logcache.json")
+        # 字体在首次绘图时才查找，避免启动时就导入 matplotlib
+        self.font_prop = None
+        # 各房间的报告在常驻线程池中并行生成，每个工作线程各自复用一个图表画布（跨周期保留）
+        self._pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="StatisticsReporter")
+        atexit.register(self._pool.shutdown, wait=True)
+        self._local = threading.local()
+        self._state_lock = threading.Lock()
+        # 内存中的解析进度，首次统计时从 log_cache_file 读取，之后每轮直接复用
+        self._log_cache = None
 
     def _init_font(self):
-        """
-        初始化字体：根据当前操作系统调整优先级，遍历常见中文字体列表，获取绝对路径并强制加载
-        """
-        # 1. 定义不同系统的推荐字体列表
-        # Windows 优先
-        windows_fonts = [
-            'Microsoft YaHei',  # 微软雅黑
-            'SimHei',  # 黑体
-            'SimSun',  # 宋体
-        ]
-
-        # Linux 优先 (Ubuntu/Debian/CentOS/Alpine)
-        linux_fonts = [
-            'WenQuanYi Micro Hei',  # 文泉驿微米黑
-            'WenQuanYi Zen Hei',  # 文泉驿正黑
-            'Noto Sans CJK SC',  # Google Noto CJK
-            'Noto Sans SC',
-            'Droid Sans Fallback',
-        ]
-
-        # MacOS 优先
-        mac_fonts = [
-            'PingFang SC',  # 苹方
-            'Hiragino Sans GB',  # 冬青黑体
-            'Heiti SC',  # 黑体-简
-        ]
-
-        # 2. 根据操作系统构建优先级列表
-        sys_platform = platform.system()
-
-        if sys_platform == 'Windows':
-            # Windows: Win字体 > Linux字体 > Mac字体
-            font_candidates = windows_fonts + linux_fonts + mac_fonts
-        elif sys_platform == 'Darwin':
-            # MacOS: Mac字体 > Win字体 > Linux字体
-            font_candidates = mac_fonts + windows_fonts + linux_fonts
-        else:
-            # Linux/Other: Linux字体 > Win字体 > Mac字体
-            font_candidates = linux_fonts + windows_fonts + mac_fonts
-
-        # 3. 获取默认回退字体路径
-        try:
-            default_prop = font_manager.FontProperties(family='sans-serif')
-            default_font_path = font_manager.findfont(default_prop)
-        except:
-            default_font_path = ""
-
-        # 4. 遍历查找
-        for font_name in font_candidates:
-            try:
-                prop = font_manager.FontProperties(family=font_name)
-                found_path = font_manager.findfont(
-                    prop,
-                    fallback_to_default=False
-                )
-
-                if os.path.exists(found_path) and found_path != default_font_path:
-                    self.logger.info(f"[{sys_platform}] 统计图表选中字体: {font_name} (路径: {found_path})")
-
-                    # 设置 matplotlib 全局参数
-                    matplotlib.rcParams['font.family'] = 'sans-serif'
-                    # 将选中的字体放在第一位，同时保留 DejaVu Sans 处理英文字符
-                    matplotlib.rcParams['font.sans-serif'] = [
-                        font_name,
-                        'DejaVu Sans',
-                        'Arial',
-                        'sans-serif'
-                    ]
-                    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示为方块的问题
-
-                    return font_manager.FontProperties(fname=found_path)
-            except:
-                continue
-
-        self.logger.warning("==================================================")
-        self.logger.warning(f"系统 ({sys_platform}) 未检测到中文字体，统计图表中文将显示为方框！")
-        self.logger.warning(f"当前默认回退字体: {default_font_path}")
-
-        if sys_platform == 'Linux':
-            self.logger.warning("请在服务器上安装中文字体，推荐命令如下：")
-            self.logger.warning("  Ubuntu/Debian: sudo apt-get install fonts-wqy-microhei")
-            self.logger.warning("  CentOS/RHEL:   sudo yum install wqy-microhei-fonts")
-            self.logger.warning("  Alpine Linux:  apk add font-wqy-zenhei")
-
-        self.logger.warning("==================================================")
-
-        # 返回默认 fallback
-        return font_manager.FontProperties(family='sans-serif')
+        """初始化图表中文字体（进程内只查找一次）"""
+        return _load_chinese_font(platform.system())
 
     def _load_state(self):
         """读取上次统计时间"""
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    state = json.loads(f.read())
             except:
                 return {}
+            # 丢弃旧版本写入的日志解析进度，状态文件中只保留各房间的上次报告时间
+            state.pop(_LEGACY_LOG_CACHE_KEY, None)
+            return state
         return {}
 
+    def _write_json(self, path, data):
+        """先写临时文件再原子替换，避免中途退出留下不完整的文件"""
+        tmp_file = path + ".tmp"
+        # 整体编码后一次写入，而不是 json.dump 按片段多次写文件
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps(data, separators=(',', ':')))
+        os.replace(tmp_file, path)
+
     def _save_state(self, state):
         """保存统计时间"""
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f)
+            self._write_json(self.state_file, state)
         except Exception as e:
             self.logger.error(f"无法保存统计状态: {e}")
 
-    def _collect_logs(self, days):
-        """收集过去 N 天的所有日志行"""
-        lines = []
-        now = datetime.datetime.now()
-        start_time = now - datetime.timedelta(days=days)
+    def _load_log_cache(self):
+        """
+        读取上次保存的日志解析进度
+        :return: 与 self._log_cache 相同结构的字典，文件不存在或内容无效时返回 None
+        """
+        if not os.path.exists(self.log_cache_file):
+            return None
+        try:
+            with open(self.log_cache_file, 'rb') as f:
+                data = json.loads(f.read())
+            points = {}
+            for room, (stamps, balances) in data['points'].items():
+                points[room] = dict(zip(map(datetime.datetime.fromisoformat, stamps), balances))
+            files = {key: (size, offset, bytes.fromhex(head)) for key, (size, offset, head) in data['files'].items()}
+            return {'days': data['days'], 'rooms': set(data['rooms']), 'files': files, 'points': points}
+        except Exception as e:
+            self.logger.warning(f"日志解析进度无效，将重新解析全部日志: {e}")
+            return None
+
+    def _save_log_cache(self, cache, stamps_by_room):
+        """
+        保存日志解析进度：各文件的 [大小, 已解析偏移, 开头字节]，以及各房间统计期内按列存放的 [时间列表, 余额列表]
+        :param stamps_by_room: {房间名: 时间字符串列表}，与 cache['points'] 中的数据点一一对应
+        """
+        data = {
+            'days': cache['days'],
+            'rooms': sorted(cache['rooms']),
+            'files': {key: [size, offset, head.hex()] for key, (size, offset, head) in cache['files'].items()},
+            'points': {room: [stamps_by_room[room], list(cache['points'][room].values())]
+                       for room in cache['points']},
+        }
+        try:
+            self._write_json(self.log_cache_file, data)
+        except Exception as e:
+            self.logger.error(f"无法保存日志解析进度: {e}")
+
+    def _iter_log_buffers(self, days):
+        """
+        依次以只读内存映射的方式打开过去 N 天的日志（当前日志及轮转备份），由内核按需换入页面，不复制到内存
+        最后修改时间早于统计起点的备份文件不可能包含统计期内的记录，直接跳过
+        :return: 逐个产出 (文件 stat 结果, mmap 对象或解压后的 bytes)
+        """
+        start_ts = time.time() - days * 24 * 3600
         base_name = os.path.basename(self.log_path)
-        dir_name = os.path.dirname(self.log_path)
+        dir_name = os.path.dirname(self.log_path) or '.'
+        prefix = base_name + "."
+
+        # 一次目录遍历同时找出当前日志与轮转备份，DirEntry 自带类型信息，stat 结果也只取一次
         target_files = []
-        if os.path.exists(self.log_path):
-            target_files.append(self.log_path)
-        if os.path.exists(dir_name):
-            for file in os.listdir(dir_name):
-                if file.startswith(base_name + "."):
-                    target_files.append(os.path.join(dir_name, file))
-
-        for fp in target_files:
+        try:
+            with os.scandir(dir_name) as it:
+                for entry in it:
+                    if (entry.name == base_name or entry.name.startswith(prefix)) and entry.is_file():
+                        target_files.append(entry)
+        except OSError as e:
+            self.logger.warning(f"无法读取日志目录 {dir_name}: {e}")
+
+        for entry in target_files:
+            fp = entry.path
             try:
-                with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines.extend(f.readlines())
+                if entry.stat().st_mtime < start_ts:
+                    continue
+                with open(fp, 'rb') as raw:
+                    # Windows 上 DirEntry.stat() 不含 inode，产出的 stat 结果取自已打开的文件
+                    st = os.fstat(raw.fileno())
+                    # 被外部工具压缩过的轮转日志解压为 bytes 后扫描，其余直接内存映射
+                    opener = _COMPRESSED_OPENERS.get(os.path.splitext(fp)[1])
+                    if opener is not None:
+                        with opener(raw, 'rb') as f:
+                            buf = f.read()
+                        if buf:
+                            yield st, buf
+                        continue
+                    # 空文件无法映射
+                    if st.st_size == 0:
+                        continue
+                    with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                        yield st, buf
             except Exception as e:
                 self.logger.warning(f"无法读取日志文件 {fp}: {e}")
-        return lines
-
-    def _parse_data(self, lines, room_name, days):
-        """从日志行中提取 (datetime, balance)"""
-        data = []
-        now = datetime.datetime.now()
-        start_time = now - datetime.timedelta(days=days)
-        safe_room_name = str(room_name)
-
-        pattern = re.compile(
-            r'(\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}).*?房间\s+' +
-            re.escape(safe_room_name) +
-            r'.*?当前余额:\s*([\d\.]+)'
-        )
 
-        for line in lines:
-            match = pattern.search(line)
-            if match:
-                dt_str, bal_str = match.groups()
-                try:
-                    dt = datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-                    if dt >= start_time:
-                        data.append((dt, float(bal_str)))
-                except ValueError:
-                    continue
-        data.sort(key=lambda x: x[0])
-        return data
+    def _scan_balances(self, buf, start, end, by_room, rooms):
+        """
+        扫描日志内容 [start, end) 区间内的余额记录
+        :param buf: 日志文件内容（bytes 或 mmap 对象）
+        :param by_room: {房间名: {datetime: balance}}，解析结果合并写入其中
+        :param rooms: 需要统计的房间名（UTF-8 编码的 bytes）集合，其余房间的记录直接跳过
+        """
+        # 绝大多数日志行不是余额记录：用C实现的 find 跳到下一个关键字，再从其所在行的行首匹配正则
+        pos = buf.find(_BALANCE_KEYWORD, start, end)
+        while pos >= 0:
+            line_start = buf.rfind(b'\n', start, pos) + 1 or start
+            line_end = buf.find(b'\n', pos, end)
+            if line_end < 0:
+                line_end = end
+            match = _BALANCE_LINE_RE.match(buf, line_start, line_end)
+            pos = buf.find(_BALANCE_KEYWORD, line_end, end)
+            if not match:
+                continue
+            dt_bytes, room_bytes, bal_bytes = match.groups()
+            # 未被监控的房间（如已从配置中删除）不做任何解码与解析
+            if room_bytes not in rooms:
+                continue
+            try:
+                # 日志时间固定为 "YYYY-MM-DD HH:MM:SS"，fromisoformat 走C实现，远快于 strptime
+                dt = datetime.datetime.fromisoformat(dt_bytes.decode('ascii'))
+                room = room_bytes.decode('utf-8')
+                by_room.setdefault(room, {})[dt] = float(bal_bytes)
+            except ValueError:
+                continue
 
-    def _draw_chart(self, room_name, data):
-        """绘制图表并返回 bytes"""
-        if not data:
+    def _collect_balances(self, days, rooms):
+        """
+        增量解析过去 N 天的余额记录，按房间提取 (datetime, balance)
+        上次得到的数据点与各日志文件（按 inode 区分，轮转改名后仍能识别）的大小及已解析偏移保存在 log_cache_file 中，
+        每次（包括进程重启后）只扫描日志新追加的部分
+        :param days: 统计天数
+        :param rooms: 需要统计的房间名列表
+        :return: {房间名: (datetime64 时间数组, float64 余额数组)}，按时间排序
+        """
+        _import_plotting()
+        start_time = datetime.datetime.now() - datetime.timedelta(days=days)
+        room_set = set(rooms)
+        room_tokens = {room.encode('utf-8') for room in room_set}
+
+        # 同一房间同一时刻只保留一条记录，即使某段日志被重复扫描也不会产生重复数据点
+        by_room = {}
+        old_files = {}
+        if self._log_cache is None:
+            self._log_cache = self._load_log_cache()
+        cache = self._log_cache
+        # 只有上次解析覆盖了全部所需房间时才能增量解析，新增监控房间时需要重新解析其历史记录
+        if cache is not None and cache['days'] == days and room_set <= cache['rooms']:
+            by_room = {room: data for room, data in cache['points'].items() if room in room_set}
+            old_files = cache['files']
+
+        files = {}
+        for st, buf in self._iter_log_buffers(days):
+            key = str(st.st_ino)
+            size, offset, head = old_files.get(key, (0, 0, b''))
+            # 文件变小（被截断）或开头字节不一致（inode 被新文件复用）时从头扫描
+            if st.st_size < size or offset > len(buf) or buf[:len(head)] != head:
+                offset = 0
+
+            # 只解析到最后一个完整行，正在写入的半行留到下次
+            end = buf.rfind(b'\n') + 1
+            if end > offset:
+                self._scan_balances(buf, offset, end, by_room, room_tokens)
+            files[key] = (st.st_size, max(offset, end), bytes(buf[:_HEAD_FINGERPRINT_SIZE]))
+
+        result = {}
+        points = {}
+        stamps_by_room = {}
+        for room, data in by_room.items():
+            room_data = sorted(item for item in data.items() if item[0] >= start_time)
+            if room_data:
+                # 时间与余额分别存入连续的 numpy 数组，供统计与绘图直接使用；
+                # 时间字符串同时用于持久化，并由 numpy 批量解析（比逐个转换 datetime 对象快）
+                stamps = [dt.isoformat(' ') for dt, _ in room_data]
+                balances = [bal for _, bal in room_data]
+                result[room] = (np.array(stamps, dtype='datetime64[s]'), np.array(balances, dtype=np.float64))
+                # 只保留统计期内的数据点，解析进度文件的大小不随运行时间增长
+                points[room] = dict(room_data)
+                stamps_by_room[room] = stamps
+
+        self._log_cache = {'days': days, 'rooms': room_set, 'files': files, 'points': points}
+        self._save_log_cache(self._log_cache, stamps_by_room)
+        return result
+
+    def _get_figure(self):
+        """获取当前线程复用的图表画布，首次调用时创建（不经过 pyplot 的全局图表管理）"""
+        local = self._local
+        if getattr(local, 'fig', None) is None:
+            _import_plotting()
+            if self.font_prop is None:
+                self.font_prop = self._init_font()
+            local.fig = Figure(figsize=(10, 5), dpi=100)
+            FigureCanvasAgg(local.fig)
+            local.ax = local.fig.add_subplot()
+        return local.fig, local.ax
+
+    def _draw_chart(self, room_name, dates, values):
+        """
+        绘制图表并返回 bytes
+        :param dates: 按时间排序的 datetime64 数组
+        :param values: 对应的余额数组
+        """
+        if not len(values):
             return None
-        dates = [x[0] for x in data]
-        values = [x[1] for x in data]
-        plt.figure(figsize=(10, 5), dpi=100)
-
-        plt.plot(dates, values, label='余额', color='#3498db', linewidth=2, marker='.', markersize=8)
-        plt.fill_between(dates, values, alpha=0.1, color='#3498db')
-        plt.title(f"宿舍 {room_name} 电费余额趋势", fontsize=14)
-        plt.xlabel("时间")
-        plt.ylabel("余额 (元)")
-        plt.grid(True, linestyle='--', alpha=0.5)
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %Hh'))
-        plt.gcf().autofmt_xdate()
+        if len(values) > _MAX_CHART_POINTS:
+            # 向上取整保证抽样后不超过上限，并始终保留最新的数据点
+            step = -(-len(values) // _MAX_CHART_POINTS)
+            index = np.arange(0, len(values), step)
+            index[-1] = len(values) - 1
+            dates = dates[index]
+            values = values[index]
+
+        # 同一线程处理的房间复用同一个 Figure，每次绘制前清空坐标轴
+        fig, ax = self._get_figure()
+        ax.clear()
+
+        ax.plot(dates, values, label='余额', color='#3498db', linewidth=2, marker='.', markersize=8)
+        ax.fill_between(dates, values, alpha=0.1, color='#3498db')
+        ax.set_title(f"宿舍 {room_name} 电费余额趋势", fontsize=14)
+        ax.set_xlabel("时间")
+        ax.set_ylabel("余额 (元)")
+        ax.grid(True, linestyle='--', alpha=0.5)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %Hh'))
+        fig.autofmt_xdate()
 
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        plt.close()
+        fig.savefig(buf, format='png', bbox_inches='tight')
         return buf.getvalue()
 
-    def _calculate_stats(self, data):
+    def _calculate_stats(self, times, values):
         """
         根据解析的数据计算统计指标
-        :param data: list of (datetime, balance)
+        :param times: 按时间排序的 datetime64 数组
+        :param values: 对应的余额数组 (float64)
         :return: dict
         """
-        if not data or len(data) < 2:
+        if len(values) < 2:
             return None
 
         # 1. 基础数据
-        start_time, start_bal = data[0]
-        end_time, end_bal = data[-1]
+        start_bal = float(values[0])
+        end_bal = float(values[-1])
 
         # 2. 计算净消耗 (Net Cost)
         net_cost = start_bal - end_bal
 
-        # 3. 计算真实累计消耗 (Gross Consumption)
-        gross_consumption = 0.0
-        for i in range(len(data) - 1):
-            curr_bal = data[i][1]
-            next_bal = data[i + 1][1]
-            diff = curr_bal - next_bal
-            if diff > 0:
-                gross_consumption += diff
+        # 3. 计算真实累计消耗 (Gross Consumption)：相邻余额的下降量之和（充值带来的上升不计入）
+        diffs = values[:-1] - values[1:]
+        gross_consumption = float(diffs[diffs > 0].sum())
 
         # 4. 计算时间跨度 (天)
-        time_span_days = (end_time - start_time).total_seconds() / (24 * 3600)
+        time_span_days = float((times[-1] - times[0]) / np.timedelta64(1, 'D'))
         # 防止时间过短除零
         if time_span_days < 0.001:
             time_span_days = 0.001
@@ -279,6 +508,77 @@ class StatisticsReporter(threading.Thread):
             "days_left": days_left
         }
 
+    def _process_one_room(self, query, balances_by_room, notification, state, now_ts):
+        """
+        为单个房间生成并发送统计报告，成功后记录本次报告时间
+        :param query: 房间配置 (room_name, recipients)
+        :param balances_by_room: _collect_balances 的解析结果
+        :param notification: 通知管理器实例
+        :param state: 报告状态字典，由多个工作线程共享
+        :param now_ts: 本轮统计的时间戳
+        :return: 是否发送了报告
+        """
+        room = query['room_name']
+        recipients = query['recipients']
+        self.logger.info(f"正在为 {room} 生成统计报告...")
+
+        times, values = balances_by_room.get(str(room), (None, ()))
+
+        if len(values) < 2:
+            self.logger.warning(f"{room} 数据不足(少于2个点)，跳过")
+            return False
+
+        stats = self._calculate_stats(times, values)
+        if not stats:
+            self.logger.warning(f"{room} 无法计算统计数据")
+            return False
+
+        img_bytes = self._draw_chart(room, times, values)
+        if not img_bytes:
+            return False
+
+        cid = "chart_img"
+
+        html = Defaults.generate_report_email(room, self.interval, cid, stats)
+
+        text = (f"宿舍 {room} 电费周报\n"
+                f"期间支出: {stats['cost']}元\n"
+                f"当前余额: {stats['end_bal']}元\n"
+                f"日均消费: {stats['daily_avg']}元/天\n"
+                f"预计可用: {stats['days_left']}天\n"
+                f"请查看邮件HTML内容获取趋势图。")
+
+        notification.send_email(
+            recipients=recipients,
+            subject=f"[{room}] 电费统计报告",
+            text_content=text,
+            html_content=html,
+            images={cid: img_bytes}
+        )
+
+        with self._state_lock:
+            state[str(room)] = now_ts
+        self.logger.info(f"{room} 统计报告发送成功")
+        return True
+
+    def _retry_delay(self, failures):
+        """连续失败 failures 次后的重试等待时间（指数退避）"""
+        return min(_MAX_SLEEP, _RETRY_BASE * 2 ** min(failures, 10))
+
+    def _next_wake_delay(self, queries, state, now_ts):
+        """
+        计算距离下一个房间到期还需等待的时间，并加入随机抖动，避免多个实例在同一时刻集中访问
+        本轮已到期但未能发送报告（如数据不足）的房间按原先的间隔，一小时后再尝试
+        """
+        period = self.interval * 24 * 3600
+        next_due = now_ts + _MAX_SLEEP
+        for query in queries:
+            due = state.get(str(query['room_name']), 0) + period
+            if due > now_ts:
+                next_due = min(next_due, due)
+        delay = min(_MAX_SLEEP, max(_MIN_SLEEP, next_due - time.time()))
+        return delay + random.uniform(0, _SLEEP_JITTER)
+
     def run(self):
         if self.interval <= 0:
             self.logger.info("统计报告服务已禁用")
@@ -286,84 +586,78 @@ class StatisticsReporter(threading.Thread):
 
         self.logger.info(f"统计报告服务已启动 (周期: {self.interval}天)")
 
+        notification = None
+        notification_smtp = None
+        failures = 0
         while True:
             try:
                 try:
                     queries = self.config_reader.get("queries")
                 except Exception as e:
                     self.logger.error(f"读取配置文件失败，跳过本次统计: {e}")
-                    time.sleep(60)  # 配置出错时缩短等待时间以便快速恢复
+                    time.sleep(self._retry_delay(failures))  # 配置出错时缩短等待时间以便快速恢复
+                    failures += 1
                     continue
 
-                smtp_config = self.config_reader.get("smtp")
-                if smtp_config:
-                    notification = NotificationManager(
-                        email_host=smtp_config["server"],
-                        email_port=smtp_config["port"],
-                        encryption=smtp_config["security"],
-                        email_username=smtp_config["username"],
-                        email_password=smtp_config["password"],
-                        email_sender=smtp_config["username"]
-                    )
-                else:
-                    self.logger.error("未找到SMTP配置")
-                    time.sleep(60)
-                    continue
                 state = self._load_state()
                 now_ts = time.time()
                 day_seconds = 24 * 3600
 
-                logs_cache = None
-
-                for query in queries:
-                    room = query['room_name']
-                    recipients = query['recipients']
-
-                    last_report = state.get(str(room), 0)
-
-                    if (now_ts - last_report) > (self.interval * day_seconds):
-                        self.logger.info(f"正在为 {room} 生成统计报告...")
-
-                        if logs_cache is None:
-                            logs_cache = self._collect_logs(self.interval)
-
-                        room_data = self._parse_data(logs_cache, room, self.interval)
-
-                        if len(room_data) < 2:
-                            self.logger.warning(f"{room} 数据不足(少于2个点)，跳过")
-                            continue
+                due_queries = [
+                    query for query in queries
+                    if (now_ts - state.get(str(query['room_name']), 0)) > (self.interval * day_seconds)
+                ]
 
-                        stats = self._calculate_stats(room_data)
-                        if not stats:
-                            self.logger.warning(f"{room} 无法计算统计数据")
-                            continue
-
-                        img_bytes = self._draw_chart(room, room_data)
-                        if img_bytes:
-                            cid = "chart_img"
-
-                            html = Defaults.generate_report_email(room, self.interval, cid, stats)
-
-                            text = (f"宿舍 {room} 电费周报\n"
-                                    f"期间支出: {stats['cost']}元\n"
-                                    f"当前余额: {stats['end_bal']}元\n"
-                                    f"日均消费: {stats['daily_avg']}元/天\n"
-                                    f"预计可用: {stats['days_left']}天\n"
-                                    f"请查看邮件HTML内容获取趋势图。")
-
-                            notification.send_email(
-                                recipients=recipients,
-                                subject=f"[{room}] 电费统计报告",
-                                text_content=text,
-                                html_content=html,
-                                images={cid: img_bytes}
-                            )
+                # 没有到期的房间时不读取SMTP配置、不解析日志，直接等待下一个房间到期
+                if not due_queries:
+                    failures = 0
+                    time.sleep(self._next_wake_delay(queries, state, now_ts))
+                    continue
 
-                            state[str(room)] = now_ts
-                            self._save_state(state)
-                            self.logger.info(f"{room} 统计报告发送成功")
+                smtp_config = self.config_reader.get("smtp")
+                if smtp_config:
+                    # 通知管理器跨周期复用，仅在SMTP配置变化时重建
+                    if notification is None or smtp_config != notification_smtp:
+                        if notification is not None:
+                            notification.close()
+                        notification = NotificationManager(
+                            email_host=smtp_config["server"],
+                            email_port=smtp_config["port"],
+                            encryption=smtp_config["security"],
+                            email_username=smtp_config["username"],
+                            email_password=smtp_config["password"],
+                            email_sender=smtp_config["username"]
+                        )
+                        notification_smtp = dict(smtp_config)
+                else:
+                    self.logger.error("未找到SMTP配置")
+                    time.sleep(self._retry_delay(failures))
+                    failures += 1
+                    continue
+                failures = 0
 
-                time.sleep(3600)
+                # 本轮所有报告发送完（或中途出错）后统一写一次状态文件
+                try:
+                    # 所有房间共享一次日志解析，只解析上次之后新追加的日志
+                    balances_by_room = self._collect_balances(self.interval, [str(q['room_name']) for q in queries])
+
+                    # 绘图与邮件发送在各房间之间互不依赖，并行处理；任一房间出错时其余房间仍会完成
+                    # 本轮所有报告共用一个SMTP连接（只登录一次），全部发送完后关闭
+                    with notification.smtp_session():
+                        futures = [
+                            self._pool.submit(self._process_one_room, q, balances_by_room, notification, state, now_ts)
+                            for q in due_queries
+                        ]
+                        wait(futures)
+                    # 逐个记录失败房间的异常，其余房间的结果不受影响，之后照常计算下次唤醒时间
+                    for query, future in zip(due_queries, futures):
+                        exc = future.exception()
+                        if exc is not None:
+                            self.logger.exception(f"{query['room_name']} 统计报告生成失败", exc_info=exc)
+                finally:
+                    self._save_state(state)
+
+                time.sleep(self._next_wake_delay(queries, state, now_ts))
 
             except Exception as e:
                 self.logger.exception("统计线程发生异常")